@@ -0,0 +1,163 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Offline job that turns the interaction log written by app.py into
+precomputed item-item neighbours for the recommendation score.
+
+Usage:
+    python CollaborativeFiltering.py
+
+Reads Interactions.jsonl and writes ItemNeighbours.json, which the running
+web server picks up on its next catalog reload.
+'''
+
+import json
+import numpy as np
+from GameRecommendation import WriteJSON, INTERACTIONS_FILE, NEIGHBOURS_FILE
+
+MAX_NEIGHBOURS = 20
+MAX_HISTORY = 200
+
+def ReadInteractions(filename):
+    '''Reads the (user, game) pairs of all detail-page clicks from the interaction log.
+
+    Parameters
+    ----------
+    filename: string
+        The name of the JSON lines log file.
+    Returns
+    -------
+    list
+        A list of (UserID, GameID) tuples in log order.
+    '''
+
+    interactions = []
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A worker may have been killed half way through a line.
+                continue
+            if record.get('event') == 'click' and record.get('user') and record.get('game'):
+                interactions.append((record['user'], str(record['game'])))
+    return interactions
+
+def BuildInteractionMatrix(interactions):
+    '''Builds a binary sparse user-game interaction matrix in coordinate form.
+
+    Parameters
+    ----------
+    interactions: list
+        A list of (UserID, GameID) tuples.
+    Returns
+    -------
+    tuple
+        The array of UserIDs (row labels), the array of GameIDs (column labels),
+        and the row and column index arrays of the non-zero entries, with
+        duplicate interactions removed. The entries are sorted by user, and
+        each user's entries by the log position of their last interaction.
+    '''
+
+    users, items = zip(*interactions)
+    user_ids, rows = np.unique(np.array(users), return_inverse=True)
+    item_ids, cols = np.unique(np.array(items), return_inverse=True)
+
+    # Keep the last occurrence of every (user, game) pair: the first one in
+    # the reversed log.
+    codes = rows.astype(np.int64) * len(item_ids) + cols
+    _, last = np.unique(codes[::-1], return_index=True)
+    positions = len(codes) - 1 - last
+    positions = positions[np.lexsort((positions, rows[positions]))]
+    return user_ids, item_ids, rows[positions], cols[positions]
+
+def ComputeItemNeighbours(n_items, rows, cols, k=MAX_NEIGHBOURS):
+    '''Computes the k nearest neighbours of every item from the co-occurrence
+    counts of the interaction matrix (X^T X), weighted by cosine similarity.
+
+    Parameters
+    ----------
+    n_items: int
+        The number of items (columns) in the matrix.
+    rows: numpy.ndarray
+        The row (user) indices of the non-zero entries, sorted.
+    cols: numpy.ndarray
+        The column (item) indices of the non-zero entries, oldest first
+        within each user.
+    k: int
+        The number of neighbours to keep per item, by default MAX_NEIGHBOURS.
+    Returns
+    -------
+    tuple
+        The item indices, neighbour indices and weights of the kept pairs.
+    '''
+
+    # Every pair of distinct items in one user's row co-occurs once.
+    # Heavy users are truncated to their MAX_HISTORY most recent items, and the
+    # item counts below are taken from the same truncated rows so the cosine
+    # stays consistent.
+    boundaries = np.flatnonzero(np.diff(rows)) + 1
+    user_rows = [user_items[-MAX_HISTORY:] for user_items in np.split(cols, boundaries)]
+    pair_codes = []
+    for user_items in user_rows:
+        if len(user_items) < 2:
+            continue
+        a, b = np.meshgrid(user_items, user_items)
+        mask = a != b
+        pair_codes.append(a[mask].astype(np.int64) * n_items + b[mask])
+    if not pair_codes:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([], dtype=float)
+
+    codes, counts = np.unique(np.concatenate(pair_codes), return_counts=True)
+    items, neighbours = np.divmod(codes, n_items)
+    item_counts = np.bincount(np.concatenate(user_rows), minlength=n_items)
+    weights = counts / np.sqrt(item_counts[items] * item_counts[neighbours])
+
+    # Sort by item, then by descending weight, and keep the first k of each item.
+    order = np.lexsort((-weights, items))
+    items, neighbours, weights = items[order], neighbours[order], weights[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(items) != 0])
+    rank = np.arange(len(items)) - np.repeat(starts, np.diff(np.r_[starts, len(items)]))
+    keep = rank < k
+    return items[keep], neighbours[keep], weights[keep]
+
+def BuildItemNeighbours(interactions, k=MAX_NEIGHBOURS):
+    '''Builds the neighbours and per-user history that Catalog loads.
+
+    Parameters
+    ----------
+    interactions: list
+        A list of (UserID, GameID) tuples.
+    k: int
+        The number of neighbours to keep per game, by default MAX_NEIGHBOURS.
+    Returns
+    -------
+    dict
+        A dictionary with the keys 'neighbours' (GameID to a list of
+        [GameID, weight] pairs) and 'history' (UserID to a list of GameIDs).
+    '''
+
+    if not interactions:
+        return {'neighbours': {}, 'history': {}}
+
+    user_ids, item_ids, rows, cols = BuildInteractionMatrix(interactions)
+    items, neighbours, weights = ComputeItemNeighbours(len(item_ids), rows, cols, k)
+
+    neighbour_map = {}
+    for item, neighbour, weight in zip(item_ids[items], item_ids[neighbours], weights):
+        neighbour_map.setdefault(str(item), []).append([str(neighbour), round(float(weight), 4)])
+
+    history = {}
+    for row, col in zip(rows, cols):
+        history.setdefault(str(user_ids[row]), []).append(str(item_ids[col]))
+
+    return {'neighbours': neighbour_map, 'history': history}
+
+if __name__ == '__main__':
+    interactions = ReadInteractions(INTERACTIONS_FILE)
+    data = BuildItemNeighbours(interactions)
+    WriteJSON(NEIGHBOURS_FILE, data)
+    print(f"{len(interactions)} interactions, {len(data['history'])} users, {len(data['neighbours'])} games with neighbours")
@@ -0,0 +1,314 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Compressed, chunked archive of the raw Steam app details (GameDetails).
+
+Each record is split in two: a "hot" projection with only the fields
+WriteSteamGamesCSV reads, and a "cold" remainder with everything else.
+Both are written as compact JSON lines, compressed in chunks, so the ETL can
+stream the hot columns without decompressing the cold ones, and a single
+record can be read back by appid by decompressing one chunk.
+
+File layout
+-----------
+MAGIC
+hot and cold chunks, each a compressed block of JSON lines
+index, a compressed JSON object (codec, chunk offsets, appid -> chunk/row)
+footer: index offset and length (two little-endian uint64) and MAGIC
+'''
+
+import gzip
+import json
+import os
+import struct
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+MAGIC = b'GDARCH1\n'
+FOOTER = struct.Struct('<QQ8s')
+CHUNK_SIZE = 500
+
+# The fields WriteSteamGamesCSV reads. Nested fields list the sub-keys that are
+# kept; list fields keep those sub-keys of every item.
+HOT_FIELDS = {
+    'steam_appid':          None,
+    'name':                 None,
+    'genres':               ['description'],
+    'is_free':              None,
+    'price_overview':       ['final_formatted'],
+    'platforms':            None,
+    'categories':           ['description'],
+    'detailed_description': None,
+    'recommendations':      ['total'],
+    'metacritic':           ['score'],
+    'release_date':         ['date'],
+}
+
+# HTML fields that are frequently an exact copy of detailed_description.
+DUPLICATE_FIELDS = ['about_the_game']
+
+def Compress(codec, data):
+    '''Compresses one chunk with the archive's codec.'''
+    if codec == 'zstd':
+        return zstd.compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def Decompress(codec, data):
+    '''Decompresses one chunk with the archive's codec.'''
+    if codec == 'zstd':
+        if zstd is None:
+            raise ValueError('This archive is zstd-compressed, which needs Python 3.14 or later')
+        return zstd.decompress(data)
+    return gzip.decompress(data)
+
+def ProjectHotFields(game):
+    '''Projects an app details record onto the hot fields.
+
+    Parameters
+    ----------
+    game: dict
+        An app details record from the Steam API.
+    Returns
+    -------
+    dict
+        The record with only the fields (and sub-fields) in HOT_FIELDS.
+    '''
+
+    hot = {}
+    for field, keys in HOT_FIELDS.items():
+        if field not in game:
+            continue
+        value = game[field]
+        if keys is not None and isinstance(value, dict):
+            value = {key: value[key] for key in keys if key in value}
+        elif keys is not None and isinstance(value, list):
+            value = [{key: item[key] for key in keys if key in item} for item in value]
+        hot[field] = value
+    return hot
+
+def SplitColdFields(game, hot):
+    '''Returns the part of a record that is not fully covered by its hot projection,
+    with exact duplicates of detailed_description replaced by a reference.
+
+    Parameters
+    ----------
+    game: dict
+        An app details record from the Steam API.
+    hot: dict
+        Its hot projection.
+    Returns
+    -------
+    dict
+        The cold remainder of the record.
+    '''
+
+    cold = {field: value for field, value in game.items() if field not in hot or hot[field] != value}
+    duplicates = [field for field in DUPLICATE_FIELDS
+                  if field in cold and cold[field] == game.get('detailed_description')]
+    for field in duplicates:
+        del cold[field]
+    if duplicates:
+        cold['_same_as_detailed_description'] = duplicates
+    return cold
+
+def MergeFields(hot, cold):
+    '''Rebuilds the full record from its hot and cold parts.'''
+    game = dict(hot)
+    game.update(cold)
+    for field in game.pop('_same_as_detailed_description', []):
+        game[field] = game.get('detailed_description')
+    return game
+
+def WriteGameDetailsArchive(filename, data, chunk_size=CHUNK_SIZE, codec=None):
+    '''Writes app details records to a chunked, compressed archive.
+
+    Parameters
+    ----------
+    filename: string
+        The name of the archive file to write.
+    data: iterable
+        The app details records (dictionaries) to archive.
+    chunk_size: int
+        The number of records per chunk, by default CHUNK_SIZE.
+    codec: string
+        'zstd' or 'gzip'. By default zstd if the standard library has it, otherwise gzip.
+    Returns
+    -------
+    int
+        The number of records written.
+    '''
+
+    codec = codec or ('zstd' if zstd is not None else 'gzip')
+    index = {'codec': codec, 'chunk_size': chunk_size, 'hot': [], 'cold': [], 'appids': {}}
+    tmp_filename = filename + '.tmp'
+    count = 0
+
+    with open(tmp_filename, 'wb') as f:
+        f.write(MAGIC)
+
+        def flush(hot_lines, cold_lines):
+            for stream, lines in (('hot', hot_lines), ('cold', cold_lines)):
+                block = Compress(codec, '\n'.join(lines).encode('utf-8'))
+                index[stream].append([f.tell(), len(block)])
+                f.write(block)
+
+        hot_lines, cold_lines = [], []
+        for game in data:
+            hot = ProjectHotFields(game)
+            cold = SplitColdFields(game, hot)
+            index['appids'][str(game.get('steam_appid'))] = [len(index['hot']), len(hot_lines)]
+            hot_lines.append(json.dumps(hot, separators=(',', ':')))
+            cold_lines.append(json.dumps(cold, separators=(',', ':')))
+            count += 1
+            if len(hot_lines) == chunk_size:
+                flush(hot_lines, cold_lines)
+                hot_lines, cold_lines = [], []
+        if hot_lines:
+            flush(hot_lines, cold_lines)
+
+        index_offset = f.tell()
+        block = gzip.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'), mtime=0)
+        f.write(block)
+        f.write(FOOTER.pack(index_offset, len(block), MAGIC))
+
+    os.replace(tmp_filename, filename)
+    return count
+
+class GameDetailsArchive:
+    '''A class that reads an archive written by WriteGameDetailsArchive.
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Filename: string
+        The name of the archive file.
+    Codec: string
+        The codec the chunks are compressed with.
+    AppIDs: dict
+        The index of the records, mapping each appid (as a string) to its
+        chunk number and row within the chunk.
+    '''
+
+    def __init__(self, Filename):
+        self.Filename = Filename
+        self._file = open(Filename, 'rb')
+        self._file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, index_length, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError(f"{Filename} is not a game details archive")
+        self._file.seek(index_offset)
+        index = json.loads(gzip.decompress(self._file.read(index_length)))
+        self.Codec = index['codec']
+        self.AppIDs = index['appids']
+        self._chunks = {'hot': index['hot'], 'cold': index['cold']}
+
+    def __len__(self):
+        return len(self.AppIDs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        '''Closes the archive file.'''
+        self._file.close()
+
+    def _read_chunk(self, stream, number):
+        offset, length = self._chunks[stream][number]
+        self._file.seek(offset)
+        return Decompress(self.Codec, self._file.read(length)).decode('utf-8').split('\n')
+
+    def records(self, full=False):
+        '''Yields every record in the order it was written, one chunk in memory at a time.
+
+        Parameters
+        ----------
+        full: bool
+            Whether to rebuild the full record, by default False (hot fields
+            only, which is all WriteSteamGamesCSV needs).
+        Returns
+        -------
+        generator
+            A generator of app details dictionaries.
+        '''
+
+        for number in range(len(self._chunks['hot'])):
+            hot_lines = self._read_chunk('hot', number)
+            if not full:
+                for line in hot_lines:
+                    yield json.loads(line)
+                continue
+            cold_lines = self._read_chunk('cold', number)
+            for hot_line, cold_line in zip(hot_lines, cold_lines):
+                yield MergeFields(json.loads(hot_line), json.loads(cold_line))
+
+    def __iter__(self):
+        return self.records()
+
+    def get(self, appid, full=False):
+        '''Reads one record by appid, decompressing only the chunk that holds it.
+
+        Parameters
+        ----------
+        appid: int or string
+            The appid of the record.
+        full: bool
+            Whether to rebuild the full record, by default False.
+        Returns
+        -------
+        dict
+            The app details record, or None if the appid is not in the archive.
+        '''
+
+        location = self.AppIDs.get(str(appid))
+        if location is None:
+            return None
+        number, row = location
+        hot = json.loads(self._read_chunk('hot', number)[row])
+        if not full:
+            return hot
+        return MergeFields(hot, json.loads(self._read_chunk('cold', number)[row]))
+
+if __name__ == '__main__':
+    # Round-trip check: every record, including null-valued and duplicated
+    # fields, must read back exactly as it was written.
+    import sys
+    import tempfile
+
+    description = '<p>A game.</p>'
+    samples = [
+        {'steam_appid': 10, 'name': 'Full', 'is_free': False, 'detailed_description': description,
+         'about_the_game': description, 'genres': [{'id': '1', 'description': 'Action'}],
+         'price_overview': {'currency': 'USD', 'final_formatted': '$9.99'}},
+        {'steam_appid': 20, 'name': 'Nulls', 'is_free': True, 'legal_notice': None,
+         'metacritic': None, 'price_overview': None, 'reviews': None, 'about_the_game': None},
+        {'steam_appid': 30, 'name': None, 'detailed_description': None, 'about_the_game': None},
+    ]
+
+    failures = 0
+    codecs = ['gzip'] + (['zstd'] if zstd is not None else [])
+    with tempfile.TemporaryDirectory() as folder:
+        for codec in codecs:
+            filename = os.path.join(folder, f"GameDetails.{codec}")
+            WriteGameDetailsArchive(filename, samples, chunk_size=2, codec=codec)
+            with GameDetailsArchive(filename) as archive:
+                if list(archive.records(full=True)) != samples:
+                    print(f"FAIL: {codec} records(full=True) does not match the input")
+                    failures += 1
+                for game in samples:
+                    if archive.get(game['steam_appid'], full=True) != game:
+                        print(f"FAIL: {codec} get({game['steam_appid']}, full=True) does not match the input")
+                        failures += 1
+    print(f"{len(samples)} records, codecs {', '.join(codecs)}: {failures} failures")
+    if failures:
+        sys.exit(1)
@@ -5,15 +5,41 @@
 
 import csv
 import json
-import requests
+import heapq
 import os
+import re
+import threading
 import time
+import importlib
 from dateutil import parser
-from bs4 import BeautifulSoup
-import numpy as np
-import plotly.graph_objects as go
-import random
-from SteamSecrets import *
+from Profiling import ActiveProfiler
+
+# The catalog-building (ETL) and plotting functions live in their own modules so
+# that serving recommendations does not import requests, bs4, numpy or plotly.
+# They are still reachable as attributes of this module and are imported on
+# first use.
+_LAZY_ATTRIBUTES = {
+    'GatSteamAppID':        'SteamETL',
+    'GetSteamGameDetails':  'SteamETL',
+    'GetRating':            'SteamETL',
+    'WriteSteamGamesCSV':   'SteamETL',
+    'CSVtoJson':            'SteamETL',
+    'VisualizeGameGraph':   'GameVisualization',
+}
+
+INTERACTIONS_FILE = 'Interactions.jsonl'
+NEIGHBOURS_FILE = 'ItemNeighbours.json'
+CF_WEIGHT = 1.0
+JSON_READ_SIZE = 1024 * 1024
+JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
 class Game():
     ''' A class that represents a Steam game.
@@ -193,7 +219,7 @@ class Graph:
             self.edges[node1.name].append((node2, score))
             self.edges[node2.name].append((node1, score))
 
-    def get_recommendations(self, user_vertex, k=5):
+    def get_recommendations(self, user_vertex, k=5, offset=0):
         ''' Returns a list of the top k recommendations for the given user vertex.
 
         Parameters  
@@ -202,6 +228,8 @@ class Graph:
             The vertex representing the user for whom to generate recommendations.
         k: int
             The number of recommendations to return, by default 5.
+        offset: int
+            The number of top recommendations to skip, by default 0.
         Returns
         -------
         list
@@ -210,13 +238,91 @@ class Graph:
             name and its score.
         '''
 
-        sorted_edges = sorted(self.edges[user_vertex.name], key=lambda x: x[1], reverse=True)
-        top_k = [(edge[0].node, edge[1]) for edge in sorted_edges[:k]]
-        return top_k
+        return RankedResults(self.edges[user_vertex.name]).page(offset, k)
+
+class RankedResults:
+    '''A class that ranks a user's edges lazily, so that only as much of the
+    ordering is computed as the pages requested so far need.
+
+    The edges are put in a heap once (linear time). Each page then pops just
+    the games it needs onto the sorted prefix, so page N+1 costs O(k log n)
+    instead of a full re-sort.
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Edges: list
+        The user's edges, as (Vertex, score) tuples.
+    Ranked: list
+        The sorted prefix of the ranking, as (Game, score) tuples.
+    '''
+
+    def __init__(self, Edges):
+        self.Edges = Edges
+        self.Ranked = []
+        # The index breaks ties in edge order, like the stable sort it replaces.
+        self._heap = [(-score, index, vertex.node) for index, (vertex, score) in enumerate(Edges)]
+        heapq.heapify(self._heap)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.Edges)
+
+    def _extend(self, n):
+        with self._lock:
+            while len(self.Ranked) < n and self._heap:
+                negative_score, _, game = heapq.heappop(self._heap)
+                self.Ranked.append((game, -negative_score))
+
+    def page(self, offset=0, k=5):
+        '''Returns one page of the ranking.
+
+        Parameters  
+        ----------
+        offset: int
+            The rank (0-based) of the first recommendation to return.
+        k: int
+            The number of recommendations to return.
+        Returns
+        -------
+        list
+            A list of (Game, score) tuples.
+        '''
+
+        self._extend(offset + k)
+        return self.Ranked[offset:offset + k]
+
+    def iterate(self, offset=0, k=5):
+        '''Yields one page of the ranking one recommendation at a time,
+        ranking each only when it is reached.
+
+        Parameters  
+        ----------
+        offset: int
+            The rank (0-based) of the first recommendation to yield.
+        k: int
+            The number of recommendations to yield.
+        Returns
+        -------
+        generator
+            A generator of (Game, score) tuples.
+        '''
+
+        for rank in range(offset, offset + k):
+            self._extend(rank + 1)
+            if rank >= len(self.Ranked):
+                return
+            yield self.Ranked[rank]
 
 def ComputeSimilarity(node1, node2):
     '''Computes the similarity score between two games based on their genres 
     and categories.
+
+    If both nodes have been encoded against the catalog's vocabularies (see
+    Catalog and ResolveUserPreferences), their genre and category bitsets are
+    compared; otherwise the lower-cased names are.
     
     Parameters  
     ----------
@@ -230,6 +336,12 @@ def ComputeSimilarity(node1, node2):
         The similarity score between the two node.
     '''
 
+    if all(hasattr(node, 'GenreMask') for node in (node1, node2)):
+        return (
+              0.7 * MaskSimilarity(node1.GenreMask, node1.GenreUnresolved, node2.GenreMask, node2.GenreUnresolved)
+            + 0.3 * MaskSimilarity(node1.CategoryMask, node1.CategoryUnresolved, node2.CategoryMask, node2.CategoryUnresolved)
+        )
+
     genres1 = set([genres.lower().strip() for genres in node1.Genres.split(',')])
     genres2 = set([genres.lower().strip() for genres in node2.Genres.split(',')])
     genre_similarity = len(genres1.intersection(genres2)) / len(genres1.union(genres2))
@@ -245,77 +357,243 @@ def ComputeSimilarity(node1, node2):
 
     return total_similarity
 
-def GatSteamAppID():
-    '''Retrieves a list of AppIDs for all application on Steam.
+PopCount = int.bit_count if hasattr(int, 'bit_count') else lambda x: bin(x).count('1')
+
+def MaskSimilarity(mask1, unresolved1, mask2, unresolved2):
+    '''Computes the Jaccard similarity of two bitsets of vocabulary codes.
 
     Parameters  
     ----------
-    None
+    mask1: int
+        The first bitset.
+    unresolved1: int
+        The number of terms of the first node that are not in the vocabulary.
+        They count towards the union but can never match.
+    mask2: int
+        The second bitset.
+    unresolved2: int
+        The number of unresolved terms of the second node.
     Returns
     -------
-    list
-        A list of dictionaries, where each dictionary represents an application
-        and contains the keys 'appid' (the application's ID) and 'name
+    float
+        The similarity between 0 and 1.
     '''
 
-    url = f"http://api.steampowered.com/ISteamApps/GetAppList/v0002/?key={STEAM_API_KEY}&format=json"
-    response = requests.get(url)
-    if response.status_code == 200:
-        AppID = json.loads(response.content)['applist']['apps']
-        AppID.sort(key=lambda x: x['appid'])
-    else:
-        print('Failed to retrieve data')
-        AppID = []
-    return AppID
-
-def GetSteamGameDetails(AppID):
-    '''Retrieves details for each game on Steam based on its AppIDs.
+    union = PopCount(mask1 | mask2) + unresolved1 + unresolved2
+    if union == 0:
+        # Both sides are empty, which the string comparison also treats as equal.
+        return 1.0
+    return PopCount(mask1 & mask2) / union
+
+# Spellings that normalization and edit distance cannot map onto the Steam name.
+VOCABULARY_ALIASES = {
+    'roleplaying':          'rpg',
+    'roleplayinggame':      'rpg',
+    'mmo':                  'massivelymultiplayer',
+    'mmorpg':               'massivelymultiplayer',
+    'f2p':                  'freetoplay',
+    'free':                 'freetoplay',
+    'sim':                  'simulation',
+    'sims':                 'simulation',
+    'sport':                'sports',
+    'racer':                'racing',
+    'indy':                 'indie',
+    'ea':                   'earlyaccess',
+    'single':               'singleplayer',
+    'solo':                 'singleplayer',
+    'multi':                'multiplayer',
+    'cooperative':          'coop',
+    'localcoop':            'sharedsplitscreencoop',
+    'couchcoop':            'sharedsplitscreencoop',
+    'splitscreencoop':      'sharedsplitscreencoop',
+    'localpvp':             'sharedsplitscreenpvp',
+    'splitscreenpvp':       'sharedsplitscreenpvp',
+    'splitscreen':          'sharedsplitscreen',
+    'localmultiplayer':     'sharedsplitscreen',
+    'couch':                'sharedsplitscreen',
+    'familyshare':          'familysharing',
+    'achievements':         'steamachievements',
+    'cloud':                'steamcloud',
+    'tradingcards':         'steamtradingcards',
+    'cards':                'steamtradingcards',
+    'controller':           'fullcontrollersupport',
+    'controllersupport':    'fullcontrollersupport',
+}
+
+def NormalizeTerm(term):
+    '''Normalizes a genre or category name for matching: lower case, with
+    everything but letters and digits removed ("Single-player" -> "singleplayer").'''
+    return ''.join(ch for ch in term.lower() if ch.isalnum())
+
+def Trigrams(term):
+    '''Returns the set of character trigrams of a normalized term, padded so
+    that short terms still have some.'''
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def EditDistance(a, b, limit):
+    '''Returns the edit distance between two strings, counting a swap of two
+    adjacent characters ("racign") as one edit, or limit + 1 as soon as it is
+    known to be larger than limit.'''
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+class Vocabulary:
+    '''A class that maps free-text genre or category names onto integer codes.
+
+    The vocabulary is built from the distinct names in the catalog. A term is
+    resolved by its normalized form, then by VOCABULARY_ALIASES, then by the
+    closest name (by edit distance) among those sharing at least half of its
+    trigrams.
+    Resolved terms are memoized, so each distinct spelling is looked up once.
 
-    Parameters  
-    ----------
-    AppID: dict
-         A list of dictionaries containing the AppIDs for each application on Steam.
-    Returns
-    -------
-    list
-        A list of dictionaries containing details for each game on Steam.
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Terms: list
+        The canonical names; a name's code is its index in this list.
     '''
 
-    GameDetails = []
-    max_retries = 5
-    base_delay = 5 
+    def __init__(self, Terms=None):
+        self.Terms = []
+        self._codes = {}
+        self._trigrams = {}
+        self._resolved = {}
+        for term in Terms or []:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.Terms)
+
+    def add(self, term):
+        '''Adds a canonical name and returns its code (or the existing one).'''
+        key = NormalizeTerm(term)
+        if not key:
+            return None
+        if key not in self._codes:
+            code = len(self.Terms)
+            self.Terms.append(term.strip())
+            self._codes[key] = code
+            for trigram in Trigrams(key):
+                self._trigrams.setdefault(trigram, set()).add(code)
+            self._resolved.clear()
+        return self._codes[key]
+
+    def resolve_term(self, term):
+        '''Resolves one user-typed term to a code.
 
-    exclude_words = {'demo', 'dlc', 'vr', 'soundtrack', 'ost', 'bundle', 'episode', 
-                     'mod', 'skin', 'theme', 'trailer', 'movie', 'book', 'comic'}
+        Parameters  
+        ----------
+        term: string
+            The term, e.g. "role playing".
+        Returns
+        -------
+        int
+            The term's code, or None if nothing in the vocabulary is close enough.
+        '''
 
-    for app in AppID:
-        id = app['appid']
-        name = app['name']
+        key = NormalizeTerm(term)
+        if key in self._resolved:
+            return self._resolved[key]
+
+        code = self._codes.get(key)
+        if code is None and key in VOCABULARY_ALIASES:
+            code = self._codes.get(VOCABULARY_ALIASES[key])
+        if code is None and len(key) >= 4:
+            code = self._closest(key)
+
+        if len(self._resolved) < 10000:
+            self._resolved[key] = code
+        return code
+
+    def _closest(self, key):
+        trigrams = Trigrams(key)
+        shared = {}
+        for trigram in trigrams:
+            for code in self._trigrams.get(trigram, ()):
+                shared[code] = shared.get(code, 0) + 1
+
+        candidates = [(NormalizeTerm(self.Terms[code]), code, count) for code, count in shared.items()]
+        # Misspelled aliases ("achievments") are matched too.
+        candidates += [(alias, self._codes[target], len(trigrams & Trigrams(alias)))
+                       for alias, target in VOCABULARY_ALIASES.items() if target in self._codes]
+
+        # A match counts towards the similarity, so it has to be close: with a
+        # looser limit "local coop" would resolve to "LAN Co-op" (3 edits).
+        limit = max(1, len(key) // 4)
+        min_shared = len(trigrams) // 2
+        best, best_rank = None, None
+        for candidate, code, count in candidates:
+            if count < min_shared:
+                continue
+            distance = EditDistance(key, candidate, limit)
+            if distance > limit:
+                continue
+            rank = (distance, -count)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = code, rank
+        return best
+
+    def encode(self, text):
+        '''Encodes a comma-separated list of names as a bitset of codes.
 
-        if exclude_words.intersection(set(name.lower().split())):
-            continue
+        Parameters  
+        ----------
+        text: string
+            The names, separated by commas.
+        Returns
+        -------
+        tuple
+            The bitset (an int with bit `code` set for every resolved name) and
+            the number of distinct names that could not be resolved.
+        '''
 
-        url = f"http://store.steampowered.com/api/appdetails?appids={id}"
-        retries = 0
-        success = False
+        mask = 0
+        unresolved = set()
+        for term in (text or '').split(','):
+            if not term.strip():
+                continue
+            code = self.resolve_term(term)
+            if code is None:
+                unresolved.add(NormalizeTerm(term) or term.strip().lower())
+            else:
+                mask |= 1 << code
+        return mask, len(unresolved)
 
-        while retries < max_retries and not success:
-            response = requests.get(url)
+def ResolveUserPreferences(user_preferences, catalog):
+    '''Resolves the user's genres and categories against the catalog's
+    vocabularies, so that ComputeSimilarity can compare bitsets.
 
-            if response.status_code == 200:
-                AppDetails = json.loads(response.content)[f'{id}']
-                if AppDetails['success'] and AppDetails['data']['type'] == 'game':
-                    GameDetails.append(AppDetails['data'])
-                success = True
-            elif response.status_code == 429:
-                print(f"Rate limited. Retrying in {base_delay * (2 ** retries)} seconds...")
-                time.sleep(base_delay * (2 ** retries))
-                retries += 1
-            else:
-                print(f"Failed to retrieve data. Response status code: {response.status_code}")
-                retries += 1
+    Parameters  
+    ----------
+    user_preferences: User
+        A User object representing the user's preferences.
+    catalog: Catalog
+        The catalog whose vocabularies to use.
+    Returns
+    -------
+    User
+        The same User object, with GenreMask, GenreUnresolved, CategoryMask
+        and CategoryUnresolved set.
+    '''
 
-    return GameDetails
+    user_preferences.GenreMask, user_preferences.GenreUnresolved = catalog.Genres.encode(user_preferences.Genres)
+    user_preferences.CategoryMask, user_preferences.CategoryUnresolved = catalog.Categories.encode(user_preferences.Categories)
+    return user_preferences
 
 def WriteJSON(filename, data):
     '''Writes data to a JSON file.
@@ -352,123 +630,67 @@ def ReadJSON(filename):
         DataJSON = json.load(f)
     return DataJSON
 
-def GetRating(game):
-    '''Retrieves the Metacritic score for a game using web scraping.
-
-    Parameters  
-    ----------
-    game: string
-        The name of the game to retrieve the score for.
-    Returns
-    -------
-    float
-        The Metacritic score for the game, or None if it cannot be retrieved.
-    '''
-
-    game_name_encoded = requests.utils.quote(game)
-    url = f"https://www.metacritic.com/search/game/{game_name_encoded}/results"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:106.0) Gecko/20100101 Firefox/106.0"}
-    response = requests.get(url, headers=headers)
-    html = response.content
-
-    soup = BeautifulSoup(html, 'html.parser')
-    result = soup.find('li', class_='result')
-    if result is None:
-        return None
-
-    title_link = result.find('h3', class_='product_title').find('a', href=True)
-    if title_link is None:
-        return None
+def IterJSONArray(filename):
+    '''Yields the items of a JSON file that holds one array, one at a time.
 
-    link = title_link['href']
-    response = requests.get(f"https://www.metacritic.com{link}", headers=headers)
-    html = response.content
+    json.load reads and parses the whole file in single calls that hold the
+    GIL, so while a large catalog is reloaded every other thread of the worker
+    stalls. Here the file is read in pieces and decoded one item per call,
+    which lets the interpreter switch threads in between.
 
-    soup = BeautifulSoup(html, 'html.parser')
-    metascore = soup.find('div', class_='metascore_w')
-
-    if metascore is None:
-        return None
-
-    rating = int(metascore.text)
-
-    return rating
-
-def WriteSteamGamesCSV(filename, data):
-    '''Writes the Steam game details to a CSV file.
-
-    Parameters  
+    Parameters
     ----------
     filename: string
-        The name of the CSV file to write to.
-    data: list
-        A list of dictionaries containing the game details.
-    Returns
-    -------
-    None
-    '''
-
-    with open(filename, 'w', newline='') as f:
-        fieldnames = [
-            'GameID',
-            'Name',
-            'Genres',
-            'Free',
-            'Price',
-            'Platform',
-            'Categories',
-            'Description',
-            'Recommendations',
-            'Rating',
-            'ReleaseDate',
-            ]
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for game in data:
-            rating = game.get('metacritic', {}).get('score', None)
-            if not rating:
-                rating = GetRating(game.get('name', None))
-                if not rating:
-                    continue
-            print(game.get('name', None))
-            writer.writerow(
-                {
-                    'GameID':           game.get('steam_appid', None),
-                    'Name':             game.get('name', None),
-                    'Genres':           ', '.join([genre['description'] for genre in game.get('genres', [])]),
-                    'Free':             game.get('is_free', None),
-                    'Price':            game.get('price_overview', {}).get('final_formatted', None),
-                    'Platform':         ', '.join(game.get('platforms', {}).keys()),
-                    'Categories':       ', '.join([category['description'] for category in game.get('categories', [])]),
-                    'Description':      game.get('detailed_description', None),
-                    'Recommendations':  game.get('recommendations', {}).get('total', None),
-                    'Rating':           rating,
-                    'ReleaseDate':      game.get('release_date', {}).get('date', None),
-                }
-            )
-
-def CSVtoJson(filenameCSV, filenameJSON):
-    '''Reads a CSV file and converts it to JSON format.
-
-    Parameters  
-    ----------
-    filenameCSV: string
-        The name of the CSV file to read.
-    filenameJSON: string
-        The name of the CSV file to read.
+        The name of the JSON file to read.
     Returns
     -------
-    None
+    generator
+        A generator of the decoded items.
     '''
 
-    data = []
-    with open(filenameCSV, mode='r', encoding='utf-8') as csv_file:
-        csv_reader = csv.DictReader(csv_file)
-        for row in csv_reader:
-            if '' in row: 
-                del row['']  
-            data.append(row)
-    WriteJSON(filenameJSON, data)
+    decoder = json.JSONDecoder()
+    buffer, index = '', 0
+    expecting = '['
+    with open(filename,'r') as f:
+        while True:
+            index = JSON_WHITESPACE.match(buffer, index).end()
+            complete = index < len(buffer)
+            if complete and expecting in ('item', 'item or ]') and buffer[index] != ']':
+                try:
+                    item, end = decoder.raw_decode(buffer, index)
+                    # An item that reaches the end of the buffer may be cut short.
+                    complete = end < len(buffer)
+                except json.JSONDecodeError:
+                    complete = False
+
+            if not complete:
+                chunk = f.read(JSON_READ_SIZE)
+                if not chunk:
+                    if index < len(buffer):
+                        # Raises the decoding error of the last item, if it has one.
+                        decoder.raw_decode(buffer, index)
+                    raise ValueError(f"{filename} ends before its JSON array does")
+                buffer, index = buffer[index:] + chunk, 0
+                continue
+
+            char = buffer[index]
+            if expecting == '[':
+                if char != '[':
+                    raise ValueError(f"{filename} does not hold a JSON array")
+                index, expecting = index + 1, 'item or ]'
+            elif expecting == ', or ]':
+                if char == ']':
+                    return
+                if char != ',':
+                    raise ValueError(f"Expecting ',' delimiter in {filename}")
+                index, expecting = index + 1, 'item'
+            elif char == ']':
+                if expecting == 'item':
+                    raise ValueError(f"Expecting a value after ',' in {filename}")
+                return
+            else:
+                yield item
+                index, expecting = end, ', or ]'
 
 def ReadSteamGamesCSV(filename):
     '''Reads a CSV file containing game details and returns a list of Game objects.
@@ -517,9 +739,8 @@ def ReadSteamGamesJSON(filename):
     ''' 
 
     games = []
-    DataJSON = ReadJSON(filename)
     
-    for data in DataJSON:
+    for data in IterJSONArray(filename):
         game = Game(
             GameID= data['GameID'],
             Name= data['Name'],
@@ -536,6 +757,234 @@ def ReadSteamGamesJSON(filename):
         games.append(game)
     return games
 
+class Catalog:
+    '''A class that represents one immutable, versioned snapshot of the game catalog.
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Version: string
+        The catalog version, derived from the modification time and size of the source file.
+    Filename: string
+        The name of the JSON file the catalog was loaded from.
+    Games: list
+        A list of Game objects.
+    GamesByName: dict
+        An index of Game objects keyed by the game's name.
+    Neighbours: dict
+        The precomputed item-item neighbours, keyed by GameID. Each value is a
+        list of [GameID, weight] pairs (see CollaborativeFiltering.py).
+    UserHistory: dict
+        The GameIDs each user has interacted with, keyed by UserID.
+    Genres: Vocabulary
+        The distinct genres of the catalog's games.
+    Categories: Vocabulary
+        The distinct categories of the catalog's games.
+    '''
+
+    def __init__(self, Version=None, Filename=None, Games=None, Neighbours=None, UserHistory=None):
+        self.Version = Version
+        self.Filename = Filename
+        self.Games = Games if Games is not None else []
+        self.GamesByName = {game.Name: game for game in self.Games}
+        self.Neighbours = Neighbours if Neighbours is not None else {}
+        self.UserHistory = UserHistory if UserHistory is not None else {}
+
+        # Encode every game once, so scoring compares bitsets instead of strings.
+        self.Genres = Vocabulary()
+        self.Categories = Vocabulary()
+        for game in self.Games:
+            game.GenreMask, game.GenreUnresolved = EncodeExact(self.Genres, game.Genres)
+            game.CategoryMask, game.CategoryUnresolved = EncodeExact(self.Categories, game.Categories)
+
+    def __str__(self) -> str:
+        return self.Version
+
+def EncodeExact(vocabulary, text):
+    '''Encodes a game's comma-separated names as a bitset, adding any new
+    names to the vocabulary.
+
+    Parameters  
+    ----------
+    vocabulary: Vocabulary
+        The vocabulary to encode against.
+    text: string
+        The names, separated by commas.
+    Returns
+    -------
+    tuple
+        The bitset and the number of unresolved names (always 0).
+    '''
+
+    mask = 0
+    for term in (text or '').split(','):
+        code = vocabulary.add(term)
+        if code is not None:
+            mask |= 1 << code
+    return mask, 0
+
+def CatalogSignature(filename):
+    '''Returns a signature that changes whenever the catalog file is replaced.
+
+    Parameters
+    ----------
+    filename: string
+        The name of the catalog JSON file.
+    Returns
+    -------
+    tuple
+        A tuple of the file's modification time (in nanoseconds) and size.
+    '''
+
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def LoadCatalog(filename, neighbours_filename=None):
+    '''Reads the catalog JSON file and builds a Catalog with its indexes.
+
+    Parameters
+    ----------
+    filename: string
+        The name of the JSON file to read.
+    neighbours_filename: string
+        The name of the item neighbours JSON file written by CollaborativeFiltering.py.
+        It is optional; without it the catalog has no collaborative signal.
+    Returns
+    -------
+    Catalog
+        A fully built Catalog object.
+    '''
+
+    mtime_ns, size = CatalogSignature(filename)
+    version = f"{mtime_ns:x}-{size:x}"
+    with ActiveProfiler.stage('ReadSteamGamesJSON'):
+        games = ReadSteamGamesJSON(filename)
+
+    neighbours, history = {}, {}
+    if neighbours_filename and os.path.isfile(neighbours_filename):
+        mtime_ns, size = CatalogSignature(neighbours_filename)
+        version += f".{mtime_ns:x}-{size:x}"
+        DataJSON = ReadJSON(neighbours_filename)
+        neighbours = DataJSON['neighbours']
+        history = DataJSON['history']
+
+    return Catalog(Version=version, Filename=filename, Games=games, Neighbours=neighbours, UserHistory=history)
+
+class CatalogReloader:
+    '''A class that watches the catalog file and swaps in a new Catalog when it changes.
+
+    The new catalog is built on a background thread, away from the request path,
+    and published by replacing a single reference. Requests that already hold the
+    previous Catalog keep using it, and it is freed once the last of them finishes.
+    The build still shares the GIL with the request threads: the catalog file is
+    decoded one game at a time (see IterJSONArray), so the parse never blocks them
+    for long, but the garbage collector passes triggered by the new objects
+    still pause them (up to about 70 ms each for a 150 MB catalog).
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Filename: string
+        The name of the catalog JSON file to watch.
+    NeighboursFilename: string
+        The name of the item neighbours JSON file to watch, if any.
+    Interval: float
+        The number of seconds between checks of the catalog file.
+    '''
+
+    def __init__(self, Filename, Interval=5.0, NeighboursFilename=None):
+        self.Filename = Filename
+        self.NeighboursFilename = NeighboursFilename
+        self.Interval = Interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = self._watched_signature()
+        self._current = LoadCatalog(Filename, NeighboursFilename)
+
+    @property
+    def current(self):
+        '''The active Catalog. Callers should read it once per request and keep the reference.'''
+        return self._current
+
+    def _watched_signature(self):
+        signature = [CatalogSignature(self.Filename)]
+        if self.NeighboursFilename and os.path.isfile(self.NeighboursFilename):
+            signature.append(CatalogSignature(self.NeighboursFilename))
+        return tuple(signature)
+
+    def check(self):
+        '''Reloads the catalog if the file has changed since the last load.
+
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        bool
+            True if a new catalog was swapped in, False otherwise.
+        '''
+
+        try:
+            signature = self._watched_signature()
+        except OSError:
+            return False
+        if signature == self._signature:
+            return False
+
+        with self._lock:
+            if signature == self._signature:
+                return False
+            try:
+                catalog = LoadCatalog(self.Filename, self.NeighboursFilename)
+            except (OSError, ValueError, KeyError) as e:
+                # The file may still be being written; try again on the next check.
+                print(f"Failed to reload catalog: {e}")
+                return False
+            self._signature = signature
+            self._current = catalog
+        print(f"Loaded catalog version {catalog.Version} ({len(catalog.Games)} games)")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.Interval):
+            self.check()
+
+    def start(self):
+        '''Starts watching the catalog file on a daemon thread.
+
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        None
+        '''
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='CatalogReloader', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        '''Stops watching the catalog file.
+
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        None
+        '''
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
 def AskUserPreferences():
     '''Asks the user for their game preferences and returns a User object 
     containing their preferences.
@@ -592,113 +1041,136 @@ def FilterGamesByPreferences(game_list, user_preferences):
 
     return filtered_games
 
-def VisualizeGameGraph(edge_data):
-    '''Generate a visualization of a user-game graph using Plotly library.
+_interaction_lock = threading.Lock()
+
+def LogInteraction(filename, event, **fields):
+    '''Appends one user interaction to the append-only JSON lines log that
+    CollaborativeFiltering.py builds the item neighbours from.
 
     Parameters  
     ----------
-    edge_data: list
-        A list of tuples representing edges in the user-game graph. Each tuple contains two elements: 
-        a `GameNode` object representing a game, and a numerical score representing the user's rating for the game.
+    filename: string
+        The name of the JSON lines log file.
+    event: string
+        The kind of interaction, e.g. 'submit' or 'click'.
+    **fields:
+        The fields to record with the event (user, game, preferences, ...).
     Returns
     -------
-    plotly.graph_objs._figure.Figure
-        A Plotly Figure object containing a visualization of the user-game graph.
+    None
     '''
 
-    user_x, user_y = 0.5, 0.5
-    game_nodes = [edge[0] for edge in edge_data]
-    scores = [edge[1] for edge in edge_data]
-
-    min_score, max_score = min(scores), max(scores)
-    normalized_scores = [(score - min_score) / (max_score - min_score) for score in scores]
-
-    angles = np.linspace(0, 2 * np.pi, len(game_nodes) + 1)[:-1]
-    distances = 0.45 * (1 - np.array(normalized_scores)) + 0.05  
-    x = user_x + distances * np.cos(angles)
-    y = user_y + distances * np.sin(angles)
-
-    edge_traces = []
-    for i in range(len(game_nodes)):
-        edge_trace = go.Scatter(
-            x=[user_x, x[i]], y=[user_y, y[i]],
-            mode='lines',
-            line=dict(color='gray', width=0.5),
-            hoverinfo='none'
-        )
-        edge_traces.append(edge_trace)
-
-    node_trace = go.Scatter(
-        x=[user_x] + list(x),
-        y=[user_y] + list(y),
-        mode='markers',
-        hoverinfo='text',
-        marker=dict(
-            size=[50] + [10 + 10 * score for score in normalized_scores],
-            color=['red'] + [f'rgb({random.randint(0, 255)}, {random.randint(0, 255)}, {random.randint(0, 255)})' for _ in game_nodes]
-        ),
-        text=['User'] + [game_node.node.__str__() for game_node in game_nodes],
-        textposition="top center"
-    )
-    
-    fig = go.Figure(data=edge_traces + [node_trace])
-    fig.update_layout(title="User-Game Graph", title_x=0.5, font= dict(size=20, color='#ffffff'), showlegend=False, xaxis=dict(range=[0, 1],showgrid=True, visible=True), yaxis=dict(range=[0, 1],showgrid=True, visible=True),plot_bgcolor='#192841', paper_bgcolor='#192841')
-    return fig
+    record = {'time': time.time(), 'event': event, **fields}
+    line = json.dumps(record) + '\n'
+    with _interaction_lock:
+        with open(filename, 'a') as f:
+            f.write(line)
+
+def CollaborativeScores(neighbours, history):
+    '''Aggregates the precomputed neighbours of the games a user has
+    interacted with into a score per candidate game.
+
+    Parameters  
+    ----------
+    neighbours: dict
+        The item-item neighbours, keyed by GameID (see Catalog.Neighbours).
+    history: list
+        The GameIDs the user has interacted with.
+    Returns
+    -------
+    dict
+        A dictionary mapping GameID to a score between 0 and 1.
+    '''
+
+    scores = {}
+    for GameID in history:
+        for neighbour, weight in neighbours.get(GameID, []):
+            scores[neighbour] = scores.get(neighbour, 0.0) + weight
+    # Games the user has already interacted with are not new recommendations.
+    for GameID in history:
+        scores.pop(GameID, None)
+    if scores:
+        max_score = max(scores.values())
+        scores = {GameID: score / max_score for GameID, score in scores.items()}
+    return scores
+
+def BuildRecommendationGraph(game_list, user_preferences, cf_scores=None):
+    '''Builds the user-game graph for one user, with an edge to every game
+    that is similar enough to the user's preferences.
+
+    Parameters  
+    ----------
+    game_list: list
+        A list of Game objects that already match the user's filters.
+    user_preferences: User
+        A User object representing the user's preferences.
+    cf_scores: dict
+        Optional collaborative scores keyed by GameID (see CollaborativeScores),
+        blended into each edge's score with weight CF_WEIGHT.
+    Returns
+    -------
+    tuple
+        The Graph and the Vertex representing the user.
+    '''
+
+    cf_scores = cf_scores or {}
+    game_graph = Graph()
+    Recommendations = []
+
+    for game in game_list:
+        game_graph.add_node(game)
+        Recommendations.append(game.Recommendations)
+    if len(Recommendations) != 0:
+        MaxRecommendation = max(Recommendations)
+    else:
+        MaxRecommendation = 1
+    # Avoid dividing by zero when none of the games have recommendations.
+    MaxRecommendation = MaxRecommendation or 1
+
+    game_graph.add_node(user_preferences)
+
+    user_vertex = game_graph.nodes[-1]
+    for game_vertex in game_graph.nodes[:-1]:
+        similarity = ComputeSimilarity(user_preferences, game_vertex.node) 
+        score = similarity + (game_vertex.node.Rating / 100.0) + 3*(game_vertex.node.Recommendations /  MaxRecommendation)
+        score += CF_WEIGHT * cf_scores.get(game_vertex.node.GameID, 0.0)
+        game_graph.add_edge(user_vertex, game_vertex, similarity, score)
+
+    return game_graph, user_vertex
 
 if __name__ == '__main__':
     
-    if os.path.isfile('SteamGames.json') == False:
+    from bs4 import BeautifulSoup
 
-        if os.path.isfile('Appid.json'):
-            AppID = ReadJSON('Appid.json')
-        else:
-            AppID = GatSteamAppID()
-            WriteJSON('AppID.json',AppID)
-
-        if os.path.isfile('GameDetails.json'):
-            GameDetails = ReadJSON('GameDetails.json')
-        else:
-            GameDetails = GetSteamGameDetails(AppID)
-            WriteJSON('GameDetails.json',GameDetails)
-        
-        WriteSteamGamesCSV('SteamGames.csv',GameDetails)
-        CSVtoJson('GameDetails.csv', 'SteamGames.json')
+    if os.path.isfile('SteamGames.json') == False:
+        from SteamETL import BuildSteamGamesJSON
+        BuildSteamGamesJSON('SteamGames.json')
     
-    GameList = ReadSteamGamesJSON('SteamGames.json')
+    catalog = LoadCatalog('SteamGames.json', NEIGHBOURS_FILE)
 
     while True:
 
         UserPreferences = AskUserPreferences()
 
-        game_graph = Graph()
-
-        FilteredGameList = FilterGamesByPreferences(GameList, UserPreferences)
-        Recommendations = []
-
-        for game in FilteredGameList:
-            game_graph.add_node(game)
-            Recommendations.append(game.Recommendations)
-        if len(Recommendations) != 0:
-            MaxRecommendation = max(Recommendations)
-        else:
-            MaxRecommendation = 1
-
-        game_graph.add_node(UserPreferences)
+        ResolveUserPreferences(UserPreferences, catalog)
 
-        user_vertex = [vertex for vertex in game_graph.nodes if vertex.node == UserPreferences][0]
-        for game_vertex in game_graph.nodes:
-            if game_vertex.node != UserPreferences:
-                similarity = ComputeSimilarity(UserPreferences, game_vertex.node) 
-                score = similarity + (game_vertex.node.Rating / 100.0) + 3*(game_vertex.node.Recommendations /  MaxRecommendation)
-                game_graph.add_edge(user_vertex, game_vertex, similarity, score)
+        FilteredGameList = FilterGamesByPreferences(catalog.Games, UserPreferences)
+        cf_scores = CollaborativeScores(catalog.Neighbours, catalog.UserHistory.get(UserPreferences.UserID, []))
+        game_graph, user_vertex = BuildRecommendationGraph(FilteredGameList, UserPreferences, cf_scores)
 
         print(game_graph.edges)
 
-        recommendations = game_graph.get_recommendations(user_vertex, k=5)
+        ranked = RankedResults(game_graph.edges[user_vertex.name])
+        offset = 0
 
         print(f"Top 5 recommended games for {UserPreferences.UserID}:")
-        for idx, (game, score) in enumerate(recommendations):
-            print(f"{idx + 1}. {game.Name} (Score: {score:.2f})")
-            soup = BeautifulSoup(game.Description, "html.parser")
-            print(soup.get_text(separator='\n'))
-            print()
\ No newline at end of file
+        while True:
+            recommendations = ranked.page(offset, k=5)
+            for idx, (game, score) in enumerate(recommendations, start=offset):
+                print(f"{idx + 1}. {game.Name} (Score: {score:.2f})")
+                soup = BeautifulSoup(game.Description, "html.parser")
+                print(soup.get_text(separator='\n'))
+                print()
+            offset += 5
+            if offset >= len(ranked) or input("Show the next 5 games? (Yes/No): ").strip().lower() != "yes":
+                break
\ No newline at end of file
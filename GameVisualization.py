@@ -0,0 +1,63 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Plotly visualization of the user-game graph.'''
+
+import random
+import numpy as np
+import plotly.graph_objects as go
+
+def VisualizeGameGraph(edge_data):
+    '''Generate a visualization of a user-game graph using Plotly library.
+
+    Parameters  
+    ----------
+    edge_data: list
+        A list of tuples representing edges in the user-game graph. Each tuple contains two elements: 
+        a `GameNode` object representing a game, and a numerical score representing the user's rating for the game.
+    Returns
+    -------
+    plotly.graph_objs._figure.Figure
+        A Plotly Figure object containing a visualization of the user-game graph.
+    '''
+
+    user_x, user_y = 0.5, 0.5
+    game_nodes = [edge[0] for edge in edge_data]
+    scores = [edge[1] for edge in edge_data]
+
+    min_score, max_score = min(scores), max(scores)
+    normalized_scores = [(score - min_score) / (max_score - min_score) for score in scores]
+
+    angles = np.linspace(0, 2 * np.pi, len(game_nodes) + 1)[:-1]
+    distances = 0.45 * (1 - np.array(normalized_scores)) + 0.05  
+    x = user_x + distances * np.cos(angles)
+    y = user_y + distances * np.sin(angles)
+
+    edge_traces = []
+    for i in range(len(game_nodes)):
+        edge_trace = go.Scatter(
+            x=[user_x, x[i]], y=[user_y, y[i]],
+            mode='lines',
+            line=dict(color='gray', width=0.5),
+            hoverinfo='none'
+        )
+        edge_traces.append(edge_trace)
+
+    node_trace = go.Scatter(
+        x=[user_x] + list(x),
+        y=[user_y] + list(y),
+        mode='markers',
+        hoverinfo='text',
+        marker=dict(
+            size=[50] + [10 + 10 * score for score in normalized_scores],
+            color=['red'] + [f'rgb({random.randint(0, 255)}, {random.randint(0, 255)}, {random.randint(0, 255)})' for _ in game_nodes]
+        ),
+        text=['User'] + [game_node.node.__str__() for game_node in game_nodes],
+        textposition="top center"
+    )
+    
+    fig = go.Figure(data=edge_traces + [node_trace])
+    fig.update_layout(title="User-Game Graph", title_x=0.5, font= dict(size=20, color='#ffffff'), showlegend=False, xaxis=dict(range=[0, 1],showgrid=True, visible=True), yaxis=dict(range=[0, 1],showgrid=True, visible=True),plot_bgcolor='#192841', paper_bgcolor='#192841')
+    return fig
@@ -0,0 +1,65 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Checks the import cost of the serving path with `python -X importtime`.
+
+Usage:
+    python ImportBudget.py [module] [budget_ms]
+
+Fails if importing the module takes longer than the budget, or if it pulls in
+any of the ETL or visualization dependencies.
+'''
+
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 50
+FORBIDDEN_MODULES = {'requests', 'bs4', 'numpy', 'plotly', 'SteamSecrets', 'SteamETL', 'GameVisualization'}
+
+def MeasureImportTime(module):
+    '''Imports a module in a fresh interpreter and parses the -X importtime report.
+
+    Parameters
+    ----------
+    module: string
+        The name of the module to import.
+    Returns
+    -------
+    dict
+        A dictionary mapping each imported module name to its cumulative
+        import time in microseconds.
+    '''
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+if __name__ == '__main__':
+    module = sys.argv[1] if len(sys.argv) > 1 else 'GameRecommendation'
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BUDGET_MS
+
+    timings = MeasureImportTime(module)
+    total_ms = timings[module] / 1000.0
+    loaded = {name.split('.')[0] for name in timings}
+    forbidden = sorted(loaded & FORBIDDEN_MODULES)
+
+    for name, cumulative in sorted(timings.items(), key=lambda x: x[1], reverse=True)[:10]:
+        print(f"{cumulative / 1000.0:8.1f} ms  {name}")
+    print(f"import {module}: {total_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+
+    if forbidden:
+        print(f"FAIL: {module} imports {', '.join(forbidden)}")
+        sys.exit(1)
+    if total_ms > budget_ms:
+        print(f"FAIL: {module} is over its import budget")
+        sys.exit(1)
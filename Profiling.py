@@ -0,0 +1,267 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Memory and CPU profiling mode for the catalog load and the request path.
+
+Enabled by setting GAME_PROFILE=1 or passing --profile on the command line.
+When it is off, the profiling hooks are no-ops.
+
+Environment variables
+---------------------
+GAME_PROFILE: enables profiling mode.
+GAME_PROFILE_TOP: the number of allocation sites to report, by default 10. With 0,
+    only the allocation total of every stage is reported, which is much cheaper.
+GAME_PROFILE_FRAMES: the number of frames tracemalloc records per allocation, by default 1.
+GAME_PROFILE_SAMPLE_RATE: the fraction of requests to run under cProfile, by default 0.
+GAME_PROFILE_TOKEN: the token required to read the cProfile dumps over HTTP.
+'''
+
+import os
+import sys
+import time
+import random
+import marshal
+import threading
+import tracemalloc
+from collections import Counter, deque
+from contextlib import contextmanager
+
+MIB = 1024 * 1024
+
+def ProfilingEnabled(argv=None):
+    '''Returns whether profiling mode was requested.
+
+    Parameters
+    ----------
+    argv: list
+        The command line arguments, by default sys.argv.
+    Returns
+    -------
+    bool
+        True if GAME_PROFILE is set to a true value or --profile was passed.
+    '''
+
+    argv = sys.argv if argv is None else argv
+    return os.environ.get('GAME_PROFILE', '').lower() in ('1', 'true', 'yes') or '--profile' in argv
+
+def CompareSnapshots(before, after):
+    '''Compares two tracemalloc snapshots by line, leaving out tracemalloc's
+    own allocations.
+
+    Snapshot.filter_traces and Snapshot.compare_to both run in Python over
+    every trace, which takes seconds once the catalog is loaded. Most traces
+    (the catalog) are the same in both snapshots, so only the traces that
+    differ are grouped, and tracemalloc's own lines are dropped from the
+    statistics, which are few.
+
+    Parameters
+    ----------
+    before: tracemalloc.Snapshot
+        The snapshot taken at the start of the stage.
+    after: tracemalloc.Snapshot
+        The snapshot taken at the end of the stage.
+    Returns
+    -------
+    list
+        The tracemalloc.StatisticDiff of every line, largest first.
+    '''
+
+    # Snapshot.traces._traces holds the raw (domain, size, traceback, total_nframe)
+    # tuples, which can be counted in C.
+    before_traces = Counter(before.traces._traces)
+    after_traces = Counter(after.traces._traces)
+    allocated = tracemalloc.Snapshot(list((after_traces - before_traces).elements()), after.traceback_limit)
+    freed = tracemalloc.Snapshot(list((before_traces - after_traces).elements()), before.traceback_limit)
+    return [stat for stat in allocated.compare_to(freed, 'lineno')
+            if stat.traceback[0].filename != tracemalloc.__file__]
+
+class Profiler:
+    '''A class that records tracemalloc snapshots around named stages and
+    keeps sampled cProfile dumps.
+
+    tracemalloc traces the whole process, so when requests run concurrently
+    their allocations show up in each other's deltas. Profile with a single
+    worker thread for exact per-request numbers. Requests sampled for
+    cProfile skip the tracemalloc stages, so their dumps show the request
+    path rather than the snapshots.
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Enabled: bool
+        Whether profiling is on.
+    TopN: int
+        The number of allocation sites to report per stage.
+    SampleRate: float
+        The fraction of requests to run under cProfile.
+    Frames: int
+        The number of frames tracemalloc records per allocation.
+    Dumps: collections.deque
+        The most recent cProfile dumps, as dictionaries with the keys 'label',
+        'time', 'duration' and 'stats' (the raw pstats data).
+    '''
+
+    def __init__(self, Enabled=False, TopN=10, SampleRate=0.0, MaxDumps=20, Frames=1):
+        self.Enabled = Enabled
+        self.TopN = TopN
+        self.SampleRate = SampleRate
+        self.Frames = Frames
+        self.Dumps = deque(maxlen=MaxDumps)
+        self._sample = threading.local()
+        if self.Enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(self.Frames)
+
+    @contextmanager
+    def stage(self, name, stages=None):
+        '''Measures the memory allocated by the code in the with block and
+        prints the top allocation sites.
+
+        Parameters
+        ----------
+        name: string
+            The name of the stage to report.
+        stages: list
+            An optional list to append (name, delta in bytes) to, used to
+            build a per-request summary.
+        Returns
+        -------
+        None
+        '''
+
+        if not self.Enabled or getattr(self._sample, 'profile', None) is not None:
+            yield
+            return
+
+        # With TopN set to 0 only the total is reported, which needs no snapshots.
+        before = tracemalloc.take_snapshot() if self.TopN else None
+        traced_before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if before is not None:
+                diff = CompareSnapshots(before, tracemalloc.take_snapshot())
+                delta = sum(stat.size_diff for stat in diff)
+            else:
+                diff = []
+                delta = tracemalloc.get_traced_memory()[0] - traced_before
+            if stages is not None:
+                stages.append((name, delta))
+            print(f"[profile] {name}: {delta / MIB:+.2f} MiB in {elapsed * 1000:.1f} ms")
+            for stat in diff[:self.TopN]:
+                frame = stat.traceback[0]
+                print(f"[profile]   {stat.size_diff / MIB:+8.2f} MiB {stat.count_diff:+8d} blocks  {frame.filename}:{frame.lineno}")
+
+    def report_request(self, label, stages):
+        '''Prints the allocation delta of every stage of one request.
+
+        Parameters
+        ----------
+        label: string
+            The request to report, e.g. 'POST /recommend'.
+        stages: list
+            A list of (name, delta in bytes) tuples recorded by stage().
+        Returns
+        -------
+        None
+        '''
+
+        if not self.Enabled or not stages:
+            return
+        total = sum(delta for _, delta in stages)
+        summary = ', '.join(f"{name} {delta / MIB:+.2f}" for name, delta in stages)
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"[profile] {label}: {total / MIB:+.2f} MiB ({summary}); traced {current / MIB:.1f} MiB, peak {peak / MIB:.1f} MiB")
+
+    def start_sample(self):
+        '''Starts a cProfile run for this request if it is sampled.
+
+        Parameters
+        ----------
+        None
+        Returns
+        -------
+        cProfile.Profile
+            The running profile, or None if the request is not sampled.
+        '''
+
+        self._sample.profile = None
+        if not self.Enabled or random.random() >= self.SampleRate:
+            return None
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another request in this process is already being profiled.
+            return None
+        profile.start_time = time.time()
+        self._sample.profile = profile
+        return profile
+
+    def finish_sample(self, profile, label):
+        '''Stops a cProfile run and keeps its dump.
+
+        Parameters
+        ----------
+        profile: cProfile.Profile
+            The profile returned by start_sample.
+        label: string
+            The request the profile belongs to.
+        Returns
+        -------
+        None
+        '''
+
+        if profile is None:
+            return
+        profile.disable()
+        self._sample.profile = None
+        profile.create_stats()
+        self.Dumps.append({
+            'label': label,
+            'time': profile.start_time,
+            'duration': time.time() - profile.start_time,
+            'stats': marshal.dumps(profile.stats),
+        })
+
+def FormatDump(dump, limit=30):
+    '''Formats a cProfile dump as text, sorted by cumulative time.
+
+    Parameters
+    ----------
+    dump: dict
+        A dump from Profiler.Dumps.
+    limit: int
+        The number of functions to list, by default 30.
+    Returns
+    -------
+    string
+        The pstats report.
+    '''
+
+    import io
+    import pstats
+
+    class _Dump:
+        def create_stats(self):
+            pass
+
+    source = _Dump()
+    source.stats = marshal.loads(dump['stats'])
+    stream = io.StringIO()
+    stats = pstats.Stats(source, stream=stream)
+    stats.sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+ActiveProfiler = Profiler(
+    Enabled=ProfilingEnabled(),
+    TopN=int(os.environ.get('GAME_PROFILE_TOP', 10)),
+    SampleRate=float(os.environ.get('GAME_PROFILE_SAMPLE_RATE', 0.0)),
+    Frames=int(os.environ.get('GAME_PROFILE_FRAMES', 1)),
+)
@@ -0,0 +1,164 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Fingerprinted, precompressed copies of the static assets, so they can be
+served with a long-lived Cache-Control header.
+'''
+
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.html', '.svg', '.json', '.txt'}
+
+class AssetPipeline:
+    '''A class that fingerprints static assets and keeps gzip copies of the
+    compressible ones.
+
+    Every asset is copied to OutputFolder as <name>.<hash>.<ext>. Because the
+    file name changes whenever the content does, the copies never need to be
+    revalidated by the browser.
+
+    Class Attributes
+    ----------------
+    None
+    Instance Attributes
+    -------------------
+    Folder: string
+        The folder containing the source assets.
+    OutputFolder: string
+        The folder the fingerprinted copies are written to.
+    Prefix: string
+        The URL prefix the fingerprinted copies are served from.
+    Manifest: dict
+        A dictionary mapping each source asset name to its fingerprinted name.
+    '''
+
+    def __init__(self, Folder, OutputFolder, Prefix='/assets/'):
+        self.Folder = Folder
+        self.OutputFolder = OutputFolder
+        self.Prefix = Prefix
+        self.Manifest = {}
+        self._lock = threading.Lock()
+        self._ensure_lock = threading.Lock()
+
+    def build(self, exclude=()):
+        '''Fingerprints every file in Folder (not recursively).
+
+        Parameters
+        ----------
+        exclude: iterable
+            Names of files to leave out, e.g. files generated per request.
+        Returns
+        -------
+        dict
+            The manifest.
+        '''
+
+        for name in sorted(os.listdir(self.Folder)):
+            path = os.path.join(self.Folder, name)
+            if name.startswith('.') or name in exclude or not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                self.add(name, f.read())
+        return self.Manifest
+
+    def add(self, name, data):
+        '''Writes a fingerprinted (and, if worthwhile, gzipped) copy of one asset.
+
+        Parameters
+        ----------
+        name: string
+            The asset's name, e.g. 'Background.jpg'.
+        data: bytes
+            The asset's content.
+        Returns
+        -------
+        string
+            The fingerprinted name.
+        '''
+
+        stem, ext = os.path.splitext(name)
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        fingerprinted = f"{stem}.{digest}{ext}"
+        path = os.path.join(self.OutputFolder, fingerprinted)
+
+        with self._lock:
+            if not os.path.isfile(path):
+                os.makedirs(self.OutputFolder, exist_ok=True)
+                WriteAtomic(path, data)
+                if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                    if len(compressed) < len(data):
+                        WriteAtomic(path + '.gz', compressed)
+            self.Manifest[name] = fingerprinted
+        return fingerprinted
+
+    def ensure(self, name, load):
+        '''Registers an asset the first time it is needed, at most once even
+        when several threads ask for it at the same time.
+
+        Parameters
+        ----------
+        name: string
+            The asset's name.
+        load: callable
+            Called without arguments to produce the asset's content (bytes).
+        Returns
+        -------
+        string
+            The URL to reference the asset by.
+        '''
+
+        if name not in self.Manifest:
+            with self._ensure_lock:
+                if name not in self.Manifest:
+                    self.add(name, load())
+        return self.url(name)
+
+    def url(self, name):
+        '''Returns the URL of an asset, falling back to the plain static URL
+        for assets that have not been fingerprinted.
+
+        Parameters
+        ----------
+        name: string
+            The asset's name.
+        Returns
+        -------
+        string
+            The URL to reference the asset by.
+        '''
+
+        fingerprinted = self.Manifest.get(name)
+        if fingerprinted is None:
+            return f"/static/{name}"
+        return self.Prefix + fingerprinted
+
+def WriteAtomic(path, data):
+    '''Writes a file by renaming a uniquely named temporary file over it, so
+    concurrent workers and threads never serve a partially written asset.
+
+    Parameters
+    ----------
+    path: string
+        The name of the file to write.
+    data: bytes
+        The content to write.
+    Returns
+    -------
+    None
+    '''
+
+    directory, basename = os.path.split(path)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=basename + '.', suffix='.tmp', delete=False) as f:
+        f.write(data)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
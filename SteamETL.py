@@ -0,0 +1,260 @@
+#########################################
+##### Name: Visuttha Manthamkarn    #####
+##### Uniqname: visuttha            #####
+#########################################
+
+'''Data collection for the game catalog: Steam API and Metacritic scraping,
+and conversion of the raw app details into SteamGames.csv/SteamGames.json.
+Only needed to (re)build the catalog, never to serve recommendations.
+'''
+
+import csv
+import json
+import os
+import time
+import requests
+from bs4 import BeautifulSoup
+from GameRecommendation import ReadJSON, WriteJSON
+from GameDetailsArchive import GameDetailsArchive, WriteGameDetailsArchive
+
+GAME_DETAILS_ARCHIVE = 'GameDetails.archive'
+
+def GatSteamAppID():
+    '''Retrieves a list of AppIDs for all application on Steam.
+
+    Parameters  
+    ----------
+    None
+    Returns
+    -------
+    list
+        A list of dictionaries, where each dictionary represents an application
+        and contains the keys 'appid' (the application's ID) and 'name
+    '''
+
+    from SteamSecrets import STEAM_API_KEY
+
+    url = f"http://api.steampowered.com/ISteamApps/GetAppList/v0002/?key={STEAM_API_KEY}&format=json"
+    response = requests.get(url)
+    if response.status_code == 200:
+        AppID = json.loads(response.content)['applist']['apps']
+        AppID.sort(key=lambda x: x['appid'])
+    else:
+        print('Failed to retrieve data')
+        AppID = []
+    return AppID
+
+def GetSteamGameDetails(AppID):
+    '''Retrieves details for each game on Steam based on its AppIDs.
+
+    Parameters  
+    ----------
+    AppID: dict
+         A list of dictionaries containing the AppIDs for each application on Steam.
+    Returns
+    -------
+    list
+        A list of dictionaries containing details for each game on Steam.
+    '''
+
+    GameDetails = []
+    max_retries = 5
+    base_delay = 5 
+
+    exclude_words = {'demo', 'dlc', 'vr', 'soundtrack', 'ost', 'bundle', 'episode', 
+                     'mod', 'skin', 'theme', 'trailer', 'movie', 'book', 'comic'}
+
+    for app in AppID:
+        id = app['appid']
+        name = app['name']
+
+        if exclude_words.intersection(set(name.lower().split())):
+            continue
+
+        url = f"http://store.steampowered.com/api/appdetails?appids={id}"
+        retries = 0
+        success = False
+
+        while retries < max_retries and not success:
+            response = requests.get(url)
+
+            if response.status_code == 200:
+                AppDetails = json.loads(response.content)[f'{id}']
+                if AppDetails['success'] and AppDetails['data']['type'] == 'game':
+                    GameDetails.append(AppDetails['data'])
+                success = True
+            elif response.status_code == 429:
+                print(f"Rate limited. Retrying in {base_delay * (2 ** retries)} seconds...")
+                time.sleep(base_delay * (2 ** retries))
+                retries += 1
+            else:
+                print(f"Failed to retrieve data. Response status code: {response.status_code}")
+                retries += 1
+
+    return GameDetails
+
+def GetRating(game):
+    '''Retrieves the Metacritic score for a game using web scraping.
+
+    Parameters  
+    ----------
+    game: string
+        The name of the game to retrieve the score for.
+    Returns
+    -------
+    float
+        The Metacritic score for the game, or None if it cannot be retrieved.
+    '''
+
+    game_name_encoded = requests.utils.quote(game)
+    url = f"https://www.metacritic.com/search/game/{game_name_encoded}/results"
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:106.0) Gecko/20100101 Firefox/106.0"}
+    response = requests.get(url, headers=headers)
+    html = response.content
+
+    soup = BeautifulSoup(html, 'html.parser')
+    result = soup.find('li', class_='result')
+    if result is None:
+        return None
+
+    title_link = result.find('h3', class_='product_title').find('a', href=True)
+    if title_link is None:
+        return None
+
+    link = title_link['href']
+    response = requests.get(f"https://www.metacritic.com{link}", headers=headers)
+    html = response.content
+
+    soup = BeautifulSoup(html, 'html.parser')
+    metascore = soup.find('div', class_='metascore_w')
+
+    if metascore is None:
+        return None
+
+    rating = int(metascore.text)
+
+    return rating
+
+def WriteSteamGamesCSV(filename, data):
+    '''Writes the Steam game details to a CSV file.
+
+    Parameters  
+    ----------
+    filename: string
+        The name of the CSV file to write to.
+    data: list
+        A list of dictionaries containing the game details.
+    Returns
+    -------
+    None
+    '''
+
+    with open(filename, 'w', newline='') as f:
+        fieldnames = [
+            'GameID',
+            'Name',
+            'Genres',
+            'Free',
+            'Price',
+            'Platform',
+            'Categories',
+            'Description',
+            'Recommendations',
+            'Rating',
+            'ReleaseDate',
+            ]
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for game in data:
+            rating = game.get('metacritic', {}).get('score', None)
+            if not rating:
+                rating = GetRating(game.get('name', None))
+                if not rating:
+                    continue
+            print(game.get('name', None))
+            writer.writerow(
+                {
+                    'GameID':           game.get('steam_appid', None),
+                    'Name':             game.get('name', None),
+                    'Genres':           ', '.join([genre['description'] for genre in game.get('genres', [])]),
+                    'Free':             game.get('is_free', None),
+                    'Price':            game.get('price_overview', {}).get('final_formatted', None),
+                    'Platform':         ', '.join(game.get('platforms', {}).keys()),
+                    'Categories':       ', '.join([category['description'] for category in game.get('categories', [])]),
+                    'Description':      game.get('detailed_description', None),
+                    'Recommendations':  game.get('recommendations', {}).get('total', None),
+                    'Rating':           rating,
+                    'ReleaseDate':      game.get('release_date', {}).get('date', None),
+                }
+            )
+
+def CSVtoJson(filenameCSV, filenameJSON):
+    '''Reads a CSV file and converts it to JSON format.
+
+    Parameters  
+    ----------
+    filenameCSV: string
+        The name of the CSV file to read.
+    filenameJSON: string
+        The name of the CSV file to read.
+    Returns
+    -------
+    None
+    '''
+
+    data = []
+    with open(filenameCSV, mode='r', encoding='utf-8') as csv_file:
+        csv_reader = csv.DictReader(csv_file)
+        for row in csv_reader:
+            if '' in row: 
+                del row['']  
+            data.append(row)
+    WriteJSON(filenameJSON, data)
+
+def ConvertGameDetailsJSON(filenameJSON, filenameArchive):
+    '''Converts a GameDetails.json file written by earlier versions into a
+    game details archive.
+
+    Parameters  
+    ----------
+    filenameJSON: string
+        The name of the JSON file to read.
+    filenameArchive: string
+        The name of the archive file to write.
+    Returns
+    -------
+    int
+        The number of records converted.
+    '''
+
+    return WriteGameDetailsArchive(filenameArchive, ReadJSON(filenameJSON))
+
+def BuildSteamGamesJSON(filename):
+    '''Builds the game catalog JSON file from Steam, reusing any intermediate
+    files (AppID.json, GameDetails.archive or GameDetails.json) that already exist.
+
+    Parameters  
+    ----------
+    filename: string
+        The name of the catalog JSON file to write.
+    Returns
+    -------
+    None
+    '''
+
+    if os.path.isfile('Appid.json'):
+        AppID = ReadJSON('Appid.json')
+    else:
+        AppID = GatSteamAppID()
+        WriteJSON('AppID.json',AppID)
+
+    if not os.path.isfile(GAME_DETAILS_ARCHIVE):
+        if os.path.isfile('GameDetails.json'):
+            ConvertGameDetailsJSON('GameDetails.json', GAME_DETAILS_ARCHIVE)
+        else:
+            WriteGameDetailsArchive(GAME_DETAILS_ARCHIVE, GetSteamGameDetails(AppID))
+
+    # Only the hot fields are decompressed, one chunk at a time.
+    with GameDetailsArchive(GAME_DETAILS_ARCHIVE) as GameDetails:
+        WriteSteamGamesCSV('SteamGames.csv',GameDetails)
+    CSVtoJson('GameDetails.csv', filename)
@@ -3,30 +3,180 @@
 ##### Uniqname: visuttha            #####
 #########################################
 
-from flask import Flask, render_template, request
-import plotly.io as pio
-from GameRecommendation import *
+import os
+import hmac
+import json
+import time
+import threading
+import mimetypes
+from collections import OrderedDict
+from flask import Flask, Response, render_template, request, g, abort, make_response, send_from_directory
+from StaticAssets import AssetPipeline
+from Profiling import ActiveProfiler, FormatDump
+from GameRecommendation import (User, FilterGamesByPreferences, ResolveUserPreferences, BuildRecommendationGraph,
+                                CollaborativeScores, RankedResults, LogInteraction, CatalogReloader,
+                                INTERACTIONS_FILE, NEIGHBOURS_FILE)
 
 app = Flask(__name__)
 
 if os.path.isfile('SteamGames.json') == False:
+    from SteamETL import BuildSteamGamesJSON
+    BuildSteamGamesJSON('SteamGames.json')
+    
+CatalogLoader = CatalogReloader('SteamGames.json', Interval=float(os.environ.get('CATALOG_RELOAD_INTERVAL', 5.0)),
+                                NeighboursFilename=NEIGHBOURS_FILE)
+CatalogLoader.start()
 
-    if os.path.isfile('Appid.json'):
-        AppID = ReadJSON('Appid.json')
-    else:
-        AppID = GatSteamAppID()
-        WriteJSON('AppID.json',AppID)
-    if os.path.isfile('GameDetails.json'):
-        GameDetails = ReadJSON('GameDetails.json')
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+Assets = AssetPipeline(app.static_folder, os.path.join(app.static_folder, 'dist'))
+Assets.build(exclude={'graph.html'})
+
+@app.context_processor
+def inject_asset_url():
+    '''Makes asset_url() available to the templates.'''
+    return {'asset_url': Assets.url}
+
+def CachedPage(html):
+    '''Wraps a deterministic page in a response with an ETag, answering
+    conditional requests for an unchanged page with 304 Not Modified.
+
+    Parameters  
+    ----------
+    html: string
+        The rendered page.
+    Returns
+    -------
+    flask.Response
+        The response to return from the view.
+    '''
+
+    response = make_response(html)
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.before_request
+def pin_catalog():
+    '''Pins the active catalog for the duration of the request, so a reload
+    that happens mid-request does not change the games the request sees.'''
+    g.catalog = CatalogLoader.current
+
+@app.after_request
+def add_catalog_version(response):
+    '''Exposes the version of the catalog that served the request.'''
+    catalog = g.get('catalog')
+    if catalog is not None:
+        response.headers['X-Catalog-Version'] = catalog.Version
+    if request.endpoint == 'static':
+        # Plain static files (e.g. graph.html) can change at any time, so make
+        # the browser revalidate them; Flask already sends their validators.
+        response.cache_control.no_cache = True
+    return response
+
+@app.before_request
+def start_profiling():
+    '''Starts collecting the per-stage allocations (or, for sampled
+    requests, a cProfile run instead) when profiling mode is on.'''
+    if ActiveProfiler.Enabled and not request.path.startswith('/debug/'):
+        g.profile_stages = []
+        g.cprofile = ActiveProfiler.start_sample()
+
+@app.after_request
+def finish_profiling(response):
+    '''Reports the allocations of the request when profiling mode is on.
+    Streamed responses report when their body has been sent instead.'''
+    if ActiveProfiler.Enabled and 'profile_stages' in g and not g.get('profile_streamed'):
+        label = f"{request.method} {request.path}"
+        ActiveProfiler.finish_sample(g.cprofile, label)
+        ActiveProfiler.report_request(label, g.profile_stages)
+    return response
+
+def CheckProfileToken():
+    '''Aborts with 404 unless profiling mode is on and the request carries
+    the token from GAME_PROFILE_TOKEN, in the X-Profile-Token header or the
+    token query parameter.'''
+    token = os.environ.get('GAME_PROFILE_TOKEN')
+    supplied = request.headers.get('X-Profile-Token') or request.args.get('token') or ''
+    if not ActiveProfiler.Enabled or not token or not hmac.compare_digest(supplied, token):
+        abort(404)
+
+@app.route('/debug/profile')
+def profile_dumps():
+    '''Lists the sampled cProfile dumps, most recent first, with the top
+    functions of each by cumulative time.
+
+    Parameters  
+    ----------
+    None
+    Returns
+    -------
+    flask.Response
+        A plain text report.
+    '''
+
+    CheckProfileToken()
+    dumps = list(ActiveProfiler.Dumps)
+    report = []
+    for index in reversed(range(len(dumps))):
+        dump = dumps[index]
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(dump['time']))
+        report.append(f"#{index} {dump['label']} at {started}, {dump['duration'] * 1000:.1f} ms")
+        report.append(FormatDump(dump, limit=request.args.get('limit', 30, type=int)))
+    if not report:
+        report.append('No sampled requests yet (see GAME_PROFILE_SAMPLE_RATE).')
+    response = make_response('\n'.join(report))
+    response.mimetype = 'text/plain'
+    return response
+
+@app.route('/debug/profile/<int:index>')
+def profile_dump(index):
+    '''Downloads one cProfile dump in the format read by pstats.Stats.
+
+    Parameters  
+    ----------
+    index: int
+        The index of the dump, as listed by /debug/profile.
+    Returns
+    -------
+    flask.Response
+        The raw dump.
+    '''
+
+    CheckProfileToken()
+    dumps = list(ActiveProfiler.Dumps)
+    if index >= len(dumps):
+        abort(404)
+    response = make_response(dumps[index]['stats'])
+    response.mimetype = 'application/octet-stream'
+    response.headers['Content-Disposition'] = f'attachment; filename=profile-{index}.prof'
+    return response
+
+@app.route('/assets/<string:filename>')
+def asset(filename):
+    '''Serves a fingerprinted asset with a long-lived Cache-Control header,
+    using the gzip copy when the browser accepts it.
+
+    Parameters  
+    ----------
+    filename: string
+        The fingerprinted name of the asset.
+    Returns
+    -------
+    flask.Response
+        The asset.
+    '''
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    gzipped = os.path.isfile(os.path.join(Assets.OutputFolder, filename + '.gz'))
+    if gzipped and 'gzip' in request.accept_encodings:
+        response = send_from_directory(Assets.OutputFolder, filename + '.gz', mimetype=mimetype, max_age=ASSET_MAX_AGE)
+        response.headers['Content-Encoding'] = 'gzip'
     else:
-        GameDetails = GetSteamGameDetails(AppID)
-        WriteJSON('GameDetails.json',GameDetails)
-    
-    WriteSteamGamesCSV('SteamGames.csv',GameDetails)
-    CSVtoJson('GameDetails.csv', 'SteamGames.json')
-    
-GameList = ReadSteamGamesJSON('SteamGames.json')
-recommendations = []
+        response = send_from_directory(Assets.OutputFolder, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if gzipped:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
 
 @app.route('/')
 def index():
@@ -40,12 +190,112 @@ def index():
     string
         The rendered HTML for the index.html template.
     '''
-    return render_template('index.html')
+    return CachedPage(render_template('index.html'))
+
+RESULT_CACHE_SIZE = 256
+MAX_PAGE_SIZE = 100
+RankedCache = OrderedDict()
+RankedCacheLock = threading.Lock()
+# The catalog version the cached rankings were built from. The rankings hold
+# that catalog's Game objects, so the cache is emptied when it is replaced.
+RankedCacheVersion = None
+
+def UserFromRequest(values):
+    '''Builds the User from the preferences submitted with a request.
+
+    Parameters  
+    ----------
+    values: werkzeug.datastructures.MultiDict
+        The form or query values of the request.
+    Returns
+    -------
+    User
+        A User object containing the user's preferences.
+    '''
+
+    return User(
+        UserID = values.get('name'),
+        Genres = values.get('genres'),
+        Free = values.get('free') == 'True',
+        Categories = values.get('categories'),
+        Platform = values.get('platform'),
+        ReleaseYear = int(values.get('release_date')),
+        )
+
+def PageFromRequest(values):
+    '''Reads the offset and page size of a request.
+
+    Parameters  
+    ----------
+    values: werkzeug.datastructures.MultiDict
+        The form or query values of the request.
+    Returns
+    -------
+    tuple
+        The offset (at least 0) and the page size k (between 1 and MAX_PAGE_SIZE).
+    '''
+
+    offset = max(values.get('offset', 0, type=int), 0)
+    k = min(max(values.get('k', 5, type=int), 1), MAX_PAGE_SIZE)
+    return offset, k
+
+def GetRankedResults(UserPreferences, catalog, stages=None):
+    '''Returns the ranking for a query, scoring the catalog only the first
+    time the query is seen, so that later pages reuse the same partial ordering.
+
+    Parameters  
+    ----------
+    UserPreferences: User
+        A User object representing the user's preferences.
+    catalog: Catalog
+        The catalog pinned for the request.
+    stages: list
+        The profiling stages of the request, if profiling is on.
+    Returns
+    -------
+    RankedResults
+        The (lazily) ranked recommendations for the query.
+    '''
+
+    # Resolving first lets differently spelled but equivalent queries share a ranking.
+    ResolveUserPreferences(UserPreferences, catalog)
+
+    # The user name is part of the key because of the collaborative score.
+    key = (catalog.Version, UserPreferences.UserID,
+           UserPreferences.GenreMask, UserPreferences.GenreUnresolved,
+           UserPreferences.CategoryMask, UserPreferences.CategoryUnresolved,
+           UserPreferences.Free, UserPreferences.Platform, UserPreferences.ReleaseYear)
+    global RankedCacheVersion
+    with RankedCacheLock:
+        current_version = CatalogLoader.current.Version
+        if RankedCacheVersion != current_version:
+            RankedCache.clear()
+            RankedCacheVersion = current_version
+        ranked = RankedCache.get(key)
+        if ranked is not None:
+            RankedCache.move_to_end(key)
+            return ranked
+
+    with ActiveProfiler.stage('filter', stages):
+        FilteredGameList = FilterGamesByPreferences(catalog.Games, UserPreferences)
+    with ActiveProfiler.stage('score', stages):
+        cf_scores = CollaborativeScores(catalog.Neighbours, catalog.UserHistory.get(UserPreferences.UserID, []))
+        game_graph, user_vertex = BuildRecommendationGraph(FilteredGameList, UserPreferences, cf_scores)
+        ranked = RankedResults(game_graph.edges[user_vertex.name])
+
+    with RankedCacheLock:
+        # A request still pinned to a replaced catalog must not cache its ranking.
+        if catalog.Version != RankedCacheVersion:
+            return ranked
+        RankedCache[key] = ranked
+        while len(RankedCache) > RESULT_CACHE_SIZE:
+            RankedCache.popitem(last=False)
+    return ranked
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
     '''Handles the user's preferences submitted from the index.html form, calculates game recommendations,
-    and renders the recommendations.html template with the recommendations.
+    and renders the recommendations.html template with one page of the recommendations.
 
     Parameters  
     ----------
@@ -56,46 +306,94 @@ def recommend():
         The rendered HTML for the recommendations.html template.
     '''
 
-    UserPreferences = User(
-        UserID = request.form.get('name'),
-        Genres = request.form.get('genres'),
-        Free = request.form.get('free') == 'True',
-        Categories = request.form.get('categories'),
-        Platform = request.form.get('platform'),
-        ReleaseYear = int(request.form.get('release_date')),
-        )
-    
-    game_graph = Graph()
+    UserPreferences = UserFromRequest(request.form)
+    offset, k = PageFromRequest(request.form)
+    stages = g.get('profile_stages')
 
-    FilteredGameList = FilterGamesByPreferences(GameList, UserPreferences)
-    Recommendations = []
+    ranked = GetRankedResults(UserPreferences, g.catalog, stages)
 
-    for game in FilteredGameList:
-        game_graph.add_node(game)
-        Recommendations.append(game.Recommendations)
-    if len(Recommendations) != 0:
-        MaxRecommendation = max(Recommendations)
-    else:
-        MaxRecommendation = 1
+    with ActiveProfiler.stage('rank', stages):
+        recommendations = ranked.page(offset, k)
 
-    game_graph.add_node(UserPreferences)
+    LogInteraction(
+        INTERACTIONS_FILE, 'submit',
+        user=UserPreferences.UserID,
+        genres=UserPreferences.Genres,
+        free=UserPreferences.Free,
+        categories=UserPreferences.Categories,
+        platform=UserPreferences.Platform,
+        release_year=UserPreferences.ReleaseYear,
+        offset=offset,
+        shown=[game.GameID for game, _ in recommendations],
+    )
 
-    user_vertex = [vertex for vertex in game_graph.nodes if vertex.node == UserPreferences][0]
-    for game_vertex in game_graph.nodes:
-        if game_vertex.node != UserPreferences:
-            similarity = ComputeSimilarity(UserPreferences, game_vertex.node) 
-            score = similarity + (game_vertex.node.Rating / 100.0) + 3*(game_vertex.node.Recommendations /  MaxRecommendation)
-            game_graph.add_edge(user_vertex, game_vertex,similarity, score)
+    # The graph only accompanies the first page; later pages skip drawing it.
+    graph_filename = None
+    if offset == 0:
+        # Plotly is only imported once the first recommendation is rendered.
+        import plotly.io as pio
+        from GameVisualization import VisualizeGameGraph
 
-    global recommendations 
-    recommendations = game_graph.get_recommendations(user_vertex, k=5)
-    
-    user_edge = list(game_graph.edges.values())[-1]
-    fig = VisualizeGameGraph(user_edge)
-    graph_filename = os.path.join('static', 'graph.html')
-    pio.write_html(fig, file=graph_filename, auto_open=False)
+        # Reference plotly.js as a fingerprinted asset instead of inlining its
+        # several megabytes into every graph.html.
+        from plotly.offline import get_plotlyjs
+        plotly_url = Assets.ensure('plotly.min.js', lambda: get_plotlyjs().encode('utf-8'))
+
+        with ActiveProfiler.stage('visualize', stages):
+            fig = VisualizeGameGraph(ranked.Edges)
+            graph_filename = '/static/graph.html'
+            pio.write_html(fig, file=os.path.join(app.static_folder, 'graph.html'), auto_open=False, include_plotlyjs=plotly_url)
+
+    with ActiveProfiler.stage('render', stages):
+        return render_template('recommendations.html', recommendations=recommendations, user=UserPreferences, graph_filename=graph_filename,
+                               offset=offset, k=k, total=len(ranked), form=request.form)
+
+@app.route('/recommend/stream', methods=['GET', 'POST'])
+def recommend_stream():
+    '''Streams one page of recommendations as JSON lines, one game per line,
+    each sent as soon as it has been ranked.
+
+    Parameters  
+    ----------
+    None
+    Returns
+    -------
+    flask.Response
+        A chunked application/x-ndjson response.
+    '''
+
+    UserPreferences = UserFromRequest(request.values)
+    offset, k = PageFromRequest(request.values)
+    stages = g.get('profile_stages')
+    ranked = GetRankedResults(UserPreferences, g.catalog, stages)
+
+    # The ranking happens while the body is streamed, after after_request has
+    # run, so the profile of this request is finished by the generator.
+    profile = g.get('cprofile')
+    label = f"{request.method} {request.path}"
+    g.profile_streamed = True
+
+    def generate():
+        try:
+            with ActiveProfiler.stage('rank', stages):
+                for rank, (game, score) in enumerate(ranked.iterate(offset, k), start=offset + 1):
+                    yield json.dumps({
+                        'rank': rank,
+                        'score': round(score, 4),
+                        'GameID': game.GameID,
+                        'Name': game.Name,
+                        'Genres': game.Genres,
+                        'Price': game.Price,
+                        'Platform': game.Platform,
+                        'ReleaseDate': game.ReleaseDate,
+                        'Image': game.Image,
+                    }) + '\n'
+        finally:
+            if stages is not None:
+                ActiveProfiler.finish_sample(profile, label)
+                ActiveProfiler.report_request(label, stages)
 
-    return render_template('recommendations.html', recommendations=recommendations, user=UserPreferences, graph_filename=graph_filename)
+    return Response(generate(), mimetype='application/x-ndjson')
 
 @app.route('/game/<string:game_name>')
 def game_description(game_name):
@@ -111,13 +409,15 @@ def game_description(game_name):
         The rendered HTML for the game_description.html template.
     '''
 
-    global recommendations
+    game = g.catalog.GamesByName.get(game_name)
+    if game is None:
+        abort(404)
 
-    for game,_ in recommendations:
-        if game.Name == game_name:
-            break
+    user = request.args.get('user')
+    if user:
+        LogInteraction(INTERACTIONS_FILE, 'click', user=user, game=game.GameID)
     
-    return render_template('game_description.html', game=game)
+    return CachedPage(render_template('game_description.html', game=game))
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file